@@ -3,256 +3,241 @@ import re
 import argparse
 import json
 import os
-from typing import Dict, Any, List, Optional
-from dataclasses import dataclass
-from enum import Enum
-
-
-class TokenType(Enum):
-    NAME = "NAME"
-    NUMBER = "NUMBER"
-    HEX = "HEX"
-    STRING = "STRING"
-    BOOL_TRUE = "BOOL_TRUE"
-    BOOL_FALSE = "BOOL_FALSE"
-    LIST_START = "(list"
-    LPAREN = "("
-    RPAREN = ")"
-    STRUCT_START = "struct{"
-    STRUCT_END = "}"
-    ASSIGN = "="
-    COMMA = ","
-    DEFINE = ":="
-    SEMICOLON = ";"
-    LBRACK = "["
-    RBRACK = "]"
-    CHR_START = "chr("
-    PLUS = "+"
-    MINUS = "-"
-    MUL = "*"
-    DIV = "/"
-    EOF = "EOF"
-
-
-@dataclass
-class Token:
-    type: TokenType
-    value: str
-    line: int
-    col: int
-
-
-class Lexer:
-    def __init__(self, text: str):
-        self.text = text
-        self.pos = 0
-        self.line = 1
-        self.col = 1
-
-    def next_token(self) -> Token:
-        while self.pos < len(self.text):
-            char = self.text[self.pos]
-
-            if char == '#':
-                self._skip_line_comment()
-                continue
-            if char.isspace():
-                self._skip_whitespace()
-                continue
+import mmap
+import stat
+import operator
+from typing import Dict, Any, List, Optional, Final, Callable
+from functools import lru_cache
+
+
+NAME: Final = 0
+NUMBER: Final = 1
+HEX: Final = 2
+STRING: Final = 3
+BOOL_TRUE: Final = 4
+BOOL_FALSE: Final = 5
+LIST_START: Final = 6
+LPAREN: Final = 7
+RPAREN: Final = 8
+STRUCT_START: Final = 9
+STRUCT_END: Final = 10
+ASSIGN: Final = 11
+COMMA: Final = 12
+DEFINE: Final = 13
+SEMICOLON: Final = 14
+LBRACK: Final = 15
+RBRACK: Final = 16
+CHR_START: Final = 17
+PLUS: Final = 18
+MINUS: Final = 19
+MUL: Final = 20
+DIV: Final = 21
+EOF: Final = 22
+
+# Имена типов токенов для сообщений об ошибках
+TOKEN_NAMES = (
+    "NAME", "NUMBER", "HEX", "STRING", "BOOL_TRUE", "BOOL_FALSE", "(list", "(", ")",
+    "struct{", "}", "=", ",", ":=", ";", "[", "]", "chr(", "+", "-", "*", "/", "EOF",
+)
+
+
+TOKEN_RE = re.compile(r"""
+    (?P<WS>\s+)
+  | (?P<LCOMMENT>\#[^\n]*)
+  | (?P<MCOMMENT>\{-(?:.*?-\}|.*))
+  | (?P<LBRACK>\[)
+  | (?P<STRUCT_START>struct\{)
+  | (?P<LIST_START>\(list)
+  | (?P<CHR_START>chr\()
+  | (?P<DEFINE>:=)
+  | (?P<SEMICOLON>;)
+  | (?P<ASSIGN>=)
+  | (?P<COMMA>,)
+  | (?P<STRUCT_END>\})
+  | (?P<RPAREN>\))
+  | (?P<BOOL_TRUE>true)
+  | (?P<BOOL_FALSE>false)
+  | (?P<NAME>[_a-zA-Z][_a-zA-Z0-9]*)
+  | (?P<HEX>0[xX][0-9a-fA-F]+)
+  | (?P<NUMBER>\d+)
+  | (?P<STRING>"(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')
+  | (?P<SKIP>["'].*|.)
+""", re.VERBOSE | re.DOTALL)
+
+_NAMED_TYPES = {
+    'LBRACK': LBRACK,
+    'STRUCT_START': STRUCT_START,
+    'LIST_START': LIST_START,
+    'CHR_START': CHR_START,
+    'DEFINE': DEFINE,
+    'SEMICOLON': SEMICOLON,
+    'ASSIGN': ASSIGN,
+    'COMMA': COMMA,
+    'STRUCT_END': STRUCT_END,
+    'RPAREN': RPAREN,
+    'BOOL_TRUE': BOOL_TRUE,
+    'BOOL_FALSE': BOOL_FALSE,
+    'NAME': NAME,
+    'HEX': HEX,
+    'NUMBER': NUMBER,
+    'STRING': STRING,
+}
+
+# Тип токена по номеру группы TOKEN_RE (None для пропускаемых групп)
+_GROUP_TYPES: List[Optional[int]] = [None] * (TOKEN_RE.groups + 1)
+for _name, _index in TOKEN_RE.groupindex.items():
+    _GROUP_TYPES[_index] = _NAMED_TYPES.get(_name)
+
+
+@lru_cache(maxsize=4096)
+def _parse_int(literal: str) -> int:
+    if literal.startswith(('0x', '0X')):
+        return int(literal, 16)
+    return int(literal)
+
+
+_UNESCAPE_RE = re.compile(r"""\\(['"])""")
+
+_INT_LITERAL_RE = re.compile(r'0[xX][0-9a-fA-F]+|\d+')
+
+_OPERATIONS: Dict[str, Callable[[int, int], int]] = {
+    '+': operator.add,
+    '-': operator.sub,
+    '*': operator.mul,
+    '/': lambda a, b: a // b if b != 0 else 0,
+}
+
+
+_BRACKET_RE = re.compile(r'[\[\]]')
+
+
+def _match_bracket(text: str, start: int) -> int:
+    depth = 0
+    for match in _BRACKET_RE.finditer(text, start):
+        if match.group() == '[':
+            depth += 1
+        else:
+            depth -= 1
+            if depth == 0:
+                return match.start()
+    return -1
 
-            if self.pos + 1 < len(self.text) and self.text[self.pos:self.pos + 2] == '{-':
-                self._skip_multiline_comment()
-                continue
 
-            if self.text[self.pos] == '[':
-                expr = self._parse_expression()
-                if expr:
-                    return expr
-
-            keyword = self._match_keyword()
-            if keyword:
-                return keyword
-
-            num = self._parse_number()
-            if num:
-                return num
-
-            string = self._parse_string()
-            if string:
-                return string
-
-            self.pos += 1
-            self.col += 1
-
-        return Token(TokenType.EOF, "", self.line, self.col)
-
-    def _skip_line_comment(self):
-        while self.pos < len(self.text) and self.text[self.pos] != '\n':
-            self.pos += 1
-            self.col += 1
-        if self.pos < len(self.text):
-            self.line += 1
-            self.col = 1
-
-    def _skip_whitespace(self):
-        while self.pos < len(self.text) and self.text[self.pos].isspace():
-            if self.text[self.pos] == '\n':
-                self.line += 1
-                self.col = 1
-            else:
-                self.col += 1
-            self.pos += 1
-
-    def _skip_multiline_comment(self):
-        self.pos += 2
-        self.col += 2
-        while self.pos + 1 < len(self.text):
-            if self.text[self.pos:self.pos + 2] == '-}':
-                self.pos += 2
-                self.col += 2
-                return
-            if self.text[self.pos] == '\n':
-                self.line += 1
-                self.col = 1
-            else:
-                self.col += 1
-            self.pos += 1
-
-    def _parse_expression(self) -> Optional[Token]:
-        start_pos = self.pos
-        start_line, start_col = self.line, self.col
-
-        end = self.pos
-        bracket_count = 0
-        while end < len(self.text):
-            if self.text[end] == '[':
-                bracket_count += 1
-            elif self.text[end] == ']':
-                bracket_count -= 1
-                if bracket_count == 0:
-                    break
-            end += 1
-
-        if end == len(self.text) or bracket_count != 0:
+def _fold_expression(content: List[str]) -> Optional[int]:
+    operands = content[1:3]
+    for operand in operands:
+        if not _INT_LITERAL_RE.fullmatch(operand):
             return None
 
-        content = self.text[start_pos + 1:end].strip().split()
-        if len(content) >= 2 and content[0] in ['+', '-', '*', '/']:
-            value = self.text[start_pos:end + 1]
-            token = Token(TokenType.LBRACK, value, start_line, start_col)
-            self.pos = end + 1
-            self.col = start_col + len(value)
-            return token
-        return None
-
-    def _parse_number(self) -> Optional[Token]:
-        match = re.match(r'0[xX][0-9a-fA-F]+|\d+', self.text[self.pos:])
-        if match:
-            value = match.group()
-            token_type = TokenType.HEX if value.lower().startswith('0x') else TokenType.NUMBER
-            token = Token(token_type, value, self.line, self.col)
-            self.pos += len(value)
-            self.col += len(value)
-            return token
-        return None
-
-    def _parse_string(self) -> Optional[Token]:
-        quote = self.text[self.pos]
-        if quote not in ["'", '"']:
-            return None
-
-        start_line, start_col = self.line, self.col
-        start = self.pos
-        self.pos += 1
-        self.col += 1
-
-        while self.pos < len(self.text):
-            if (self.text[self.pos] == quote and
-                    (self.pos == 0 or self.text[self.pos - 1] != '\\')):
-                value = self.text[start:self.pos + 1]
-                self.pos += 1
-                self.col += 1
-                return Token(TokenType.STRING, value, start_line, start_col)
-
-            if self.text[self.pos] == '\n':
-                self.line += 1
-                self.col = 1
-            else:
-                self.col += 1
-            self.pos += 1
-        return None
-
-    def _match_keyword(self) -> Optional[Token]:
-        patterns = {
-            'struct{': TokenType.STRUCT_START,
-            '(list': TokenType.LIST_START,
-            'chr(': TokenType.CHR_START,
-            ':=': TokenType.DEFINE,
-            ';': TokenType.SEMICOLON,
-            '=': TokenType.ASSIGN,
-            ',': TokenType.COMMA,
-            '}': TokenType.STRUCT_END,
-            ')': TokenType.RPAREN,
-            'true': TokenType.BOOL_TRUE,
-            'false': TokenType.BOOL_FALSE,
-        }
-
-        for pattern, ttype in patterns.items():
-            if self.text.startswith(pattern, self.pos):
-                token = Token(ttype, pattern, self.line, self.col)
-                self.pos += len(pattern)
-                self.col += len(pattern)
-                return token
-
-        match = re.match(r'[_a-zA-Z][_a-zA-Z0-9]*', self.text[self.pos:])
-        if match:
-            value = match.group()
-            token = Token(TokenType.NAME, value, self.line, self.col)
-            self.pos += len(value)
-            self.col += len(value)
-            return token
-
-        return None
+    arg1 = _parse_int(operands[0])
+    if len(operands) == 1:
+        return arg1
+    return _OPERATIONS[content[0]](arg1, _parse_int(operands[1]))
 
 
 class Parser:
-    def __init__(self, lexer: Lexer):
-        self.lexer = lexer
-        self.current_token = lexer.next_token()
+    def __init__(self, text: str):
+        self.text = text
+        self.pos = 0
+        self.current_type = EOF
+        self.current_value: Any = ""
+        self.current_start = 0
         self.constants: Dict[str, Any] = {}
 
-    def eat(self, token_type: TokenType):
-        if self.current_token.type == token_type:
-            self.current_token = self.lexer.next_token()
+        self._handlers: List[Optional[Callable[[], Any]]] = [None] * len(TOKEN_NAMES)
+        self._handlers[NUMBER] = self._parse_number
+        self._handlers[HEX] = self._parse_number
+        self._handlers[STRING] = self._parse_string
+        self._handlers[BOOL_TRUE] = self._parse_true
+        self._handlers[BOOL_FALSE] = self._parse_false
+        self._handlers[NAME] = self._parse_name
+        self._handlers[LIST_START] = self._parse_list
+        self._handlers[STRUCT_START] = self._parse_struct
+        self._handlers[CHR_START] = self._parse_chr
+        self._handlers[LBRACK] = self._parse_expression
+
+        self.advance()
+
+    def advance(self):
+        text = self.text
+        pos = self.pos
+        while pos < len(text):
+            match = TOKEN_RE.match(text, pos)
+            start, pos = match.span()
+            token_type = _GROUP_TYPES[match.lastindex]
+            if token_type is None:
+                continue
+
+            if token_type == NAME:
+                value = sys.intern(match.group())
+            elif token_type == NUMBER or token_type == HEX:
+                value = _parse_int(match.group())
+            elif token_type == STRING:
+                value = _UNESCAPE_RE.sub(r'\1', text[start + 1:pos - 1])
+            elif token_type == LBRACK:
+                close = _match_bracket(text, start)
+                if close < 0:
+                    continue
+                content = text[start + 1:close].split()
+                if len(content) < 2 or content[0] not in _OPERATIONS:
+                    continue
+                pos = close + 1
+                value = text[start:pos]
+                folded = _fold_expression(content)
+                if folded is not None:
+                    token_type, value = NUMBER, folded
+            else:
+                value = None
+
+            self.current_type = token_type
+            self.current_value = value
+            self.current_start = start
+            self.pos = pos
+            return
+
+        self.pos = pos
+        self.current_type = EOF
+        self.current_value = ""
+        self.current_start = len(text)
+
+    def location(self) -> str:
+        start = self.current_start
+        line = self.text.count('\n', 0, start) + 1
+        col = start - self.text.rfind('\n', 0, start)
+        return f"{line}:{col}"
+
+    def eat(self, token_type: int):
+        if self.current_type == token_type:
+            self.advance()
         else:
-            raise SyntaxError(f"{self.current_token.line}:{self.current_token.col}: "
-                              f"Ожидался {token_type.value}, получен {self.current_token.type.value}")
+            raise SyntaxError(f"{self.location()}: "
+                              f"Ожидался {TOKEN_NAMES[token_type]}, получен {TOKEN_NAMES[self.current_type]}")
 
     def parse(self) -> Dict[str, Any]:
         result = {}
-        while self.current_token.type != TokenType.EOF:
-            if self.current_token.type == TokenType.SEMICOLON:
-                self.eat(TokenType.SEMICOLON)
+        while self.current_type != EOF:
+            if self.current_type == SEMICOLON:
+                self.eat(SEMICOLON)
                 continue
 
-            if self.current_token.type == TokenType.NAME:
-                name = self.current_token.value
-                self.eat(TokenType.NAME)
+            if self.current_type == NAME:
+                name = self.current_value
+                self.eat(NAME)
 
-                if self.current_token.type == TokenType.DEFINE:
-                    self.eat(TokenType.DEFINE)
+                if self.current_type == DEFINE:
+                    self.eat(DEFINE)
                     value = self._parse_value()
                     self.constants[name] = value
-                    if self.current_token.type == TokenType.SEMICOLON:
-                        self.eat(TokenType.SEMICOLON)
+                    if self.current_type == SEMICOLON:
+                        self.eat(SEMICOLON)
                     result[name] = value
-                elif self.current_token.type == TokenType.ASSIGN:
-                    self.eat(TokenType.ASSIGN)
+                elif self.current_type == ASSIGN:
+                    self.eat(ASSIGN)
                     value = self._parse_value()
-                    if self.current_token.type == TokenType.SEMICOLON:
-                        self.eat(TokenType.SEMICOLON)
+                    if self.current_type == SEMICOLON:
+                        self.eat(SEMICOLON)
                     result[name] = value
-                elif self.current_token.type == TokenType.STRUCT_START:
+                elif self.current_type == STRUCT_START:
                     value = self._parse_struct()
                     result[name] = value
                 else:
@@ -262,123 +247,106 @@ class Parser:
         return result
 
     def _parse_value(self) -> Any:
-        token = self.current_token
-
-        if token.type in (TokenType.NUMBER, TokenType.HEX):
-            value = int(token.value, 16) if token.type == TokenType.HEX else int(token.value)
-            self.eat(token.type)
-            return value
-
-        if token.type == TokenType.STRING:
-            value = token.value[1:-1].replace('\\"', '"').replace("\\'", "'")
-            self.eat(token.type)
-            return value
-
-        if token.type == TokenType.BOOL_TRUE:
-            self.eat(TokenType.BOOL_TRUE)
-            return True
-        if token.type == TokenType.BOOL_FALSE:
-            self.eat(TokenType.BOOL_FALSE)
-            return False
-
-        if token.type == TokenType.NAME:
-            name = token.value
-            if name in self.constants:
-                self.eat(TokenType.NAME)
-                return self.constants[name]
-            self.eat(TokenType.NAME)
-            return name
-
-        if token.type == TokenType.LIST_START:
-            return self._parse_list()
-        if token.type == TokenType.STRUCT_START:
-            return self._parse_struct()
-        if token.type == TokenType.CHR_START:
-            return self._parse_chr()
-        if token.type == TokenType.LBRACK:
-            return self._parse_expression()
-
-        raise SyntaxError(f"{token.line}:{token.col}: Неожиданное значение: {token.type.value}")
+        handler = self._handlers[self.current_type]
+        if handler is None:
+            raise SyntaxError(f"{self.location()}: "
+                              f"Неожиданное значение: {TOKEN_NAMES[self.current_type]}")
+        return handler()
+
+    def _parse_number(self) -> int:
+        value = self.current_value
+        self.advance()
+        return value
+
+    def _parse_string(self) -> str:
+        value = self.current_value
+        self.advance()
+        return value
+
+    def _parse_true(self) -> bool:
+        self.advance()
+        return True
+
+    def _parse_false(self) -> bool:
+        self.advance()
+        return False
+
+    def _parse_name(self) -> Any:
+        name = self.current_value
+        self.advance()
+        return self.constants.get(name, name)
 
     def _parse_list(self) -> List[Any]:
-        self.eat(TokenType.LIST_START)
+        self.eat(LIST_START)
         result = []
-        while self.current_token.type != TokenType.RPAREN and self.current_token.type != TokenType.EOF:
+        while self.current_type != RPAREN and self.current_type != EOF:
             result.append(self._parse_value())
-            if self.current_token.type == TokenType.COMMA:
-                self.eat(TokenType.COMMA)
-        self.eat(TokenType.RPAREN)
+            if self.current_type == COMMA:
+                self.eat(COMMA)
+        self.eat(RPAREN)
         return result
 
     def _parse_struct(self) -> Dict[str, Any]:
         result = {}
-        self.eat(TokenType.STRUCT_START)
+        self.eat(STRUCT_START)
 
-        while self.current_token.type != TokenType.EOF and self.current_token.type != TokenType.STRUCT_END:
-            if self.current_token.type != TokenType.NAME:
-                self.current_token = self.lexer.next_token()
+        while self.current_type != EOF and self.current_type != STRUCT_END:
+            if self.current_type != NAME:
+                self.advance()
                 continue
 
-            name = self.current_token.value
-            self.eat(TokenType.NAME)
+            name = self.current_value
+            self.eat(NAME)
 
-            if self.current_token.type != TokenType.ASSIGN:
-                raise SyntaxError(f"{self.current_token.line}:{self.current_token.col}: "
-                                  f"Ожидался '=', получен {self.current_token.type.value}")
+            if self.current_type != ASSIGN:
+                raise SyntaxError(f"{self.location()}: "
+                                  f"Ожидался '=', получен {TOKEN_NAMES[self.current_type]}")
 
-            self.eat(TokenType.ASSIGN)
+            self.eat(ASSIGN)
             value = self._parse_value()
             result[name] = value
 
-            if self.current_token.type == TokenType.COMMA:
-                self.eat(TokenType.COMMA)
+            if self.current_type == COMMA:
+                self.eat(COMMA)
 
-        self.eat(TokenType.STRUCT_END)
+        self.eat(STRUCT_END)
         return result
 
     def _parse_chr(self) -> str:
-        self.eat(TokenType.CHR_START)
+        self.eat(CHR_START)
         arg = self._parse_value()
-        self.eat(TokenType.RPAREN)
+        self.eat(RPAREN)
         return chr(arg) if isinstance(arg, int) else '?'
 
     def _parse_expression(self) -> Any:
-        expr_str = self.current_token.value
-        self.eat(TokenType.LBRACK)
+        expr_str = self.current_value
+        self.eat(LBRACK)
 
         content = expr_str[1:-1].strip().split()
         if len(content) < 2:
             raise SyntaxError(f"Некорректное выражение: {expr_str}")
 
         op = content[0]
-        if op not in ['+', '-', '*', '/']:
+        if op not in _OPERATIONS:
             raise SyntaxError(f"Неизвестная операция: {op}")
 
         arg1_str = content[1].strip()
-        if arg1_str in self.constants:
-            arg1 = self.constants[arg1_str]
-        else:
-            arg1 = int(arg1_str, 16) if arg1_str.lower().startswith('0x') else int(arg1_str)
+        arg1 = self.constants.get(arg1_str)
+        if arg1 is None:
+            arg1 = _parse_int(arg1_str)
 
         if len(content) == 2:
             return arg1
 
         arg2_str = content[2].strip()
-        if arg2_str in self.constants:
-            arg2 = self.constants[arg2_str]
-        else:
-            arg2 = int(arg2_str, 16) if arg2_str.lower().startswith('0x') else int(arg2_str)
+        arg2 = self.constants.get(arg2_str)
+        if arg2 is None:
+            arg2 = _parse_int(arg2_str)
 
         if not isinstance(arg1, int) or not isinstance(arg2, int):
             raise SyntaxError(f"Аргументы должны быть числами: {expr_str}")
 
-        ops = {
-            '+': arg1 + arg2,
-            '-': arg1 - arg2,
-            '*': arg1 * arg2,
-            '/': arg1 // arg2 if arg2 != 0 else 0
-        }
-        return ops[op]
+        return _OPERATIONS[op](arg1, arg2)
 
 
 def main():
@@ -391,8 +359,15 @@ def main():
     output_file = args.output
 
     if args.input and os.path.exists(args.input):
-        with open(args.input, 'r', encoding='utf-8') as f:
-            text = f.read()
+        with open(args.input, 'rb') as f:
+            st = os.fstat(f.fileno())
+            if stat.S_ISREG(st.st_mode) and st.st_size:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    text = str(mm, 'utf-8')
+            else:
+                text = f.read().decode('utf-8')
+        if '\r' in text:
+            text = text.replace('\r\n', '\n').replace('\r', '\n')
         print(f"Загружен: {args.input}")
     else:
         text = sys.stdin.read()
@@ -402,15 +377,17 @@ def main():
 
     print("Парсинг...")
     try:
-        lexer = Lexer(text)
-        parser_obj = Parser(lexer)
+        parser_obj = Parser(text)
         result = parser_obj.parse()
 
-        os.makedirs(os.path.dirname(output_file) if os.path.dirname(output_file) else '.', exist_ok=True)
+        output_dir = os.path.dirname(output_file)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        output = json.dumps(result, ensure_ascii=False, indent=2)
         with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(result, f, ensure_ascii=False, indent=2)
+            f.write(output)
         print(f"Сохранено: {output_file}")
-        print(json.dumps(result, indent=2, ensure_ascii=False))
+        print(output)
 
     except Exception as e:
         print(f"Ошибка: {e}")